@@ -1,5 +1,5 @@
-from rl_exercises.week_4.buffers import ReplayBuffer
+from rl_exercises.week_4.buffers import ReplayBatch, ReplayBuffer
 from rl_exercises.week_4.dqn import DQNAgent
 from rl_exercises.week_4.networks import QNetwork
 
-__all__ = ["DQNAgent", "ReplayBuffer", "QNetwork"]
+__all__ = ["DQNAgent", "ReplayBatch", "ReplayBuffer", "QNetwork"]
@@ -1,32 +1,90 @@
-from typing import Any, Dict, List, Tuple
+from typing import NamedTuple, Tuple
 
 import numpy as np
+import torch
 from rl_exercises.agent import AbstractBuffer
 
 
+class ReplayBatch(NamedTuple):
+    """
+    A mini-batch of transitions, one tensor per field.
+
+    The leading dimension of every tensor is the batch size.
+    """
+
+    states: torch.Tensor
+    actions: torch.Tensor
+    rewards: torch.Tensor
+    next_states: torch.Tensor
+    dones: torch.Tensor
+
+
 class ReplayBuffer(AbstractBuffer):
     """
     Simple FIFO replay buffer.
 
-    Stores tuples of (state, action, reward, next_state, done, info),
-    and evicts the oldest when capacity is exceeded.
+    Stores transitions in preallocated, contiguous tensors (one per field)
+    used as a ring buffer, and overwrites the oldest transition when
+    capacity is exceeded. The storage lives on `device`, so sampled batches
+    can be fed to a network on the same device without further copies.
+
+    For CPU storage, `add` writes through NumPy views that share memory with
+    the tensors, which avoids creating a tensor per field and step. If the
+    consumer lives on a GPU, `pin_memory` makes sampled batches page-locked
+    so they can be copied to the GPU asynchronously.
     """
 
-    def __init__(self, capacity: int) -> None:
+    def __init__(
+        self,
+        capacity: int,
+        obs_shape: Tuple[int, ...] | None = None,
+        device: torch.device | str = "cpu",
+        pin_memory: bool = False,
+    ) -> None:
         """
         Parameters
         ----------
         capacity : int
             Maximum number of transitions to store.
+        obs_shape : tuple of int, optional
+            Shape of a single observation. If None, it is inferred from the
+            first added state.
+        device : torch.device or str
+            Device on which the transitions are stored and sampled.
+        pin_memory : bool
+            Gather sampled batches into pinned (page-locked) host memory.
+            Only applies to CPU storage and when CUDA is available.
         """
         super().__init__()
         self.capacity = capacity
-        self.states: List[np.ndarray] = []
-        self.actions: List[int] = []
-        self.rewards: List[float] = []
-        self.next_states: List[np.ndarray] = []
-        self.dones: List[bool] = []
-        self.infos: List[Dict] = []
+        self.device = torch.device(device)
+        self.pin_memory = (
+            pin_memory and self.device.type == "cpu" and torch.cuda.is_available()
+        )
+        self.ptr = 0  # next slot to write
+        self.size = 0  # number of valid transitions
+
+        self.actions = torch.empty(capacity, dtype=torch.int64, device=self.device)
+        self.rewards = torch.empty(capacity, dtype=torch.float32, device=self.device)
+        self.dones = torch.empty(capacity, dtype=torch.float32, device=self.device)
+        self.states: torch.Tensor | None = None
+        self.next_states: torch.Tensor | None = None
+        # NumPy views of the storage (CPU only), in ReplayBatch field order
+        self._host_views: Tuple[np.ndarray, ...] | None = None
+        if obs_shape is not None:
+            self._allocate_obs(tuple(obs_shape))
+
+    def _allocate_obs(self, obs_shape: Tuple[int, ...]) -> None:
+        """Allocate the observation tensors for a given observation shape."""
+        shape = (self.capacity, *obs_shape)
+        self.states = torch.empty(shape, dtype=torch.float32, device=self.device)
+        self.next_states = torch.empty(shape, dtype=torch.float32, device=self.device)
+        if self.device.type == "cpu":
+            self._host_views = tuple(t.numpy() for t in self._fields())
+
+    def _fields(self) -> Tuple[torch.Tensor, ...]:
+        """Storage tensors in ReplayBatch field order."""
+        return self.states, self.actions, self.rewards, self.next_states, self.dones
 
     def add(
         self,
@@ -40,7 +98,7 @@ class ReplayBuffer(AbstractBuffer):
         """
         Add a single transition to the buffer.
 
-        If the buffer is full, the oldest transition is removed.
+        If the buffer is full, the oldest transition is overwritten.
 
         Parameters
         ----------
@@ -55,30 +113,88 @@ class ReplayBuffer(AbstractBuffer):
         done : bool
             Whether episode terminated/truncated.
         info : dict
-            Gym info dict (can store extras).
+            Gym info dict (not stored).
+        """
+        if self.states is None:
+            self._allocate_obs(np.shape(state))
+
+        i = self.ptr
+        if self._host_views is not None:
+            states, actions, rewards, next_states, dones = self._host_views
+            states[i] = state
+            actions[i] = action
+            rewards[i] = reward
+            next_states[i] = next_state
+            dones[i] = done
+        else:
+            self.states[i].copy_(torch.as_tensor(state))
+            self.actions[i] = action
+            self.rewards[i] = reward
+            self.next_states[i].copy_(torch.as_tensor(next_state))
+            self.dones[i] = done
+
+        self.ptr = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(
+        self,
+        states: np.ndarray,
+        actions: np.ndarray,
+        rewards: np.ndarray,
+        next_states: np.ndarray,
+        dones: np.ndarray,
+    ) -> None:
+        """
+        Add several transitions at once, e.g. one per sub-environment.
+
+        Equivalent to calling `add` for each transition in order, but writes
+        every field with a single vectorized assignment.
+
+        Parameters
+        ----------
+        states : np.ndarray
+            Observations before action, shape (n, *obs_shape).
+        actions : np.ndarray
+            Actions taken, shape (n,).
+        rewards : np.ndarray
+            Rewards received, shape (n,).
+        next_states : np.ndarray
+            Observations after action, shape (n, *obs_shape).
+        dones : np.ndarray
+            Whether each episode terminated/truncated, shape (n,).
         """
-        if len(self.states) >= self.capacity:
-            # # TODO (DONE): pop the oldest element off each list (states, actions, …, infos)
-            self.states.pop(0)
-            self.actions.pop(0)
-            self.rewards.pop(0)
-            self.next_states.pop(0)
-            self.dones.pop(0)
-            self.infos.pop(0)
-
-        # TODO (DONE): append state, action, reward, next_state, done, info to their respective lists
-        self.states.append(state)
-        self.actions.append(action)
-        self.rewards.append(reward)
-        self.next_states.append(next_state)
-        self.dones.append(done)
-        self.infos.append(info)
-
-    def sample(
-        self, batch_size: int = 32
-    ) -> List[Tuple[Any, Any, float, Any, bool, Dict]]:
+        n = len(actions)
+        if n == 0:
+            return
+        if self.states is None:
+            self._allocate_obs(np.shape(states)[1:])
+
+        batch = (states, actions, rewards, next_states, dones)
+        if n > self.capacity:
+            # only the newest `capacity` transitions would survive anyway
+            batch = tuple(values[-self.capacity :] for values in batch)
+            self.ptr = (self.ptr + n - self.capacity) % self.capacity
+            n = self.capacity
+
+        idxs = (self.ptr + np.arange(n)) % self.capacity
+        if self._host_views is not None:
+            for view, values in zip(self._host_views, batch):
+                view[idxs] = values
+        else:
+            idxs_t = torch.as_tensor(idxs, device=self.device)
+            for t, values in zip(self._fields(), batch):
+                t.index_copy_(
+                    0,
+                    idxs_t,
+                    torch.as_tensor(values, dtype=t.dtype, device=self.device),
+                )
+
+        self.ptr = (self.ptr + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def sample(self, batch_size: int = 32) -> ReplayBatch:
         """
-        Uniformly sample a batch of transitions.
+        Uniformly sample a batch of transitions (with replacement).
 
         Parameters
         ----------
@@ -87,24 +203,24 @@ class ReplayBuffer(AbstractBuffer):
 
         Returns
         -------
-        List of transitions as (state, action, reward, next_state, done, info).
+        ReplayBatch
+            Batched tensors of states, actions, rewards, next_states and dones,
+            on the buffer's device (in pinned memory if `pin_memory` is set).
         """
-        # TODO (DONE): randomly choose `batch_size` unique indices from [0, len(self.states))
-
-        idxs = np.random.choice(len(self.states), size=batch_size, replace=False)
-        return [
-            (
-                self.states[i],
-                self.actions[i],
-                self.rewards[i],
-                self.next_states[i],
-                self.dones[i],
-                self.infos[i],
+        idxs = torch.randint(0, self.size, (batch_size,), device=self.device)
+        if not self.pin_memory:
+            return ReplayBatch(*(t.index_select(0, idxs) for t in self._fields()))
+
+        batch = []
+        for t in self._fields():
+            # freshly allocated pinned tensors come from PyTorch's caching host
+            # allocator, which keeps them alive until pending copies finish
+            out = torch.empty(
+                (batch_size, *t.shape[1:]), dtype=t.dtype, pin_memory=True
             )
-            for i in idxs
-        ]
+            batch.append(torch.index_select(t, 0, idxs, out=out))
+        return ReplayBatch(*batch)
 
     def __len__(self) -> int:
         """Current number of stored transitions."""
-        # TODO (DONE): return the current buffer size
-        return len(self.states)
+        return self.size
@@ -2,7 +2,9 @@
 Deep Q-Learning implementation.
 """
 
-from typing import Any, Dict, List, Tuple
+import copy
+import warnings
+from typing import Callable, Dict, List, Tuple
 
 import gymnasium as gym
 import hydra
@@ -10,10 +12,12 @@ import matplotlib.pyplot as plt
 import numpy as np
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import torch.optim as optim
+from gymnasium.vector import AutoresetMode
 from omegaconf import DictConfig
 from rl_exercises.agent import AbstractAgent
-from rl_exercises.week_4.buffers import ReplayBuffer
+from rl_exercises.week_4.buffers import ReplayBatch, ReplayBuffer
 from rl_exercises.week_4.networks import QNetwork
 
 
@@ -38,6 +42,68 @@ def set_seed(env: gym.Env, seed: int = 0) -> None:
         env.observation_space.seed(seed)
 
 
+def script_module(module: nn.Module) -> Callable[[torch.Tensor], torch.Tensor]:
+    """
+    TorchScript a module, falling back to the eager module if that fails.
+
+    The scripted module shares its parameters with `module`, so later
+    in-place updates (optimizer steps, load_state_dict) are visible in both.
+
+    Parameters
+    ----------
+    module : nn.Module
+        Module to script.
+
+    Returns
+    -------
+    Callable
+        The scripted module, or `module` itself.
+    """
+    try:
+        with warnings.catch_warnings():
+            # torch.jit is deprecated in recent PyTorch but still works and
+            # is the cheapest option for batch-1 inference without compiling
+            warnings.simplefilter("ignore", FutureWarning)
+            return torch.jit.script(module)
+    except Exception:
+        # scripting fails with many unrelated exception types (FrontendError
+        # for unsupported syntax, OSError without source code, RuntimeError,
+        # TypeError, ...); the eager module always works
+        return module
+
+
+class RewardWindow:
+    """
+    Running mean of the most recent episode returns.
+
+    Keeps the returns in a fixed-size NumPy ring buffer together with their
+    running sum, so adding a return and querying the mean are both O(1).
+    """
+
+    def __init__(self, size: int) -> None:
+        """
+        Parameters
+        ----------
+        size : int
+            Number of most recent returns to average over.
+        """
+        self.values = np.zeros(size, dtype=np.float64)
+        self.idx = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        """Add an episode return, evicting the oldest one if full."""
+        self.total += value - float(self.values[self.idx])
+        self.values[self.idx] = value
+        self.idx = (self.idx + 1) % len(self.values)
+        self.count = min(self.count + 1, len(self.values))
+
+    def mean(self) -> float:
+        """Mean of the stored returns (0.0 if there are none)."""
+        return self.total / self.count if self.count else 0.0
+
+
 class DQNAgent(AbstractAgent):
     """
     Deep Q-Learning agent with ε-greedy policy and target network.
@@ -60,6 +126,14 @@ class DQNAgent(AbstractAgent):
         epsilon_decay: int = 500,
         target_update_freq: int = 1000,
         seed: int = 0,
+        device: str = "cpu",
+        buffer_device: str | None = None,
+        compile_networks: bool = False,
+        double_dqn: bool = False,
+        train_freq: int = 4,
+        n_updates: int = 1,
+        q_network: QNetwork | None = None,
+        huber_loss: bool = False,
     ) -> None:
         """
         Initialize replay buffer, Q-networks, optimizer, and hyperparameters.
@@ -67,7 +141,9 @@ class DQNAgent(AbstractAgent):
         Parameters
         ----------
         env : gym.Env
-            The Gym environment.
+            The Gym environment, or a gym.vector.VectorEnv (with next-step
+            autoreset) to collect experience from several environment copies
+            at once.
         buffer_capacity : int
             Max experiences stored.
         batch_size : int
@@ -86,6 +162,29 @@ class DQNAgent(AbstractAgent):
             How many updates between target-network syncs.
         seed : int
             RNG seed.
+        device : str
+            Torch device for the networks.
+        buffer_device : str, optional
+            Torch device for the replay buffer; defaults to `device`. A CPU
+            buffer for CUDA networks samples into pinned memory and copies
+            batches to the GPU asynchronously.
+        compile_networks : bool
+            If True, run action selection and the update loss through
+            torch.compile (mode="reduce-overhead"). Pays a one-off compile
+            cost at construction in exchange for lower per-call overhead.
+        double_dqn : bool
+            If True, use Double DQN targets: the online network selects the
+            next action, the target network evaluates it.
+        train_freq : int
+            Number of environment steps between rounds of updates.
+        n_updates : int
+            Number of gradient updates per round.
+        q_network : QNetwork, optional
+            Online Q-network to train instead of a freshly built one, e.g. a
+            network in shared memory that several Hogwild workers update.
+        huber_loss : bool
+            If True, regress onto the TD target with the Huber (smooth-L1)
+            loss instead of MSE, which bounds the gradient of large TD errors.
         """
         super().__init__(
             env,
@@ -98,20 +197,70 @@ class DQNAgent(AbstractAgent):
             epsilon_decay,
             target_update_freq,
             seed,
+            device,
+            buffer_device,
+            compile_networks,
+            double_dqn,
+            train_freq,
+            n_updates,
+            q_network,
+            huber_loss,
         )
         self.env = env
+        self.is_vector_env = isinstance(env, gym.vector.VectorEnv)
+        if self.is_vector_env:
+            # _train_vectorized drops the step after each episode end, which
+            # is only a reset step (not a transition) in next-step mode
+            autoreset_mode = env.metadata.get("autoreset_mode", AutoresetMode.NEXT_STEP)
+            if autoreset_mode != AutoresetMode.NEXT_STEP:
+                raise ValueError(
+                    "DQNAgent requires vector environments with "
+                    f"autoreset_mode=AutoresetMode.NEXT_STEP, got {autoreset_mode}."
+                )
         set_seed(env, seed)
 
-        obs_dim = env.observation_space.shape[0]
-        n_actions = env.action_space.n
+        if self.is_vector_env:
+            self.num_envs = env.num_envs
+            obs_space = env.single_observation_space
+            n_actions = int(env.single_action_space.n)
+        else:
+            self.num_envs = 1
+            obs_space = env.observation_space
+            n_actions = int(env.action_space.n)
+        obs_dim = obs_space.shape[0]
 
         # main Q-network and frozen target
-        self.q = QNetwork(obs_dim, n_actions)
-        self.target_q = QNetwork(obs_dim, n_actions)
-        self.target_q.load_state_dict(self.q.state_dict())
+        if q_network is None:
+            q_network = QNetwork(obs_dim, n_actions)
+        self.q = q_network.to(device)
+        # a private copy, so it matches a custom `q_network`'s architecture and
+        # does not share memory with it (e.g. a Hogwild shared network)
+        self.target_q = copy.deepcopy(self.q)
+        self.device = next(self.q.parameters()).device
+        if self.device.type == "cuda":
+            # batch shapes are fixed, so let cuDNN autotune its kernels, and
+            # allow TF32 matmuls/convolutions on Ampere and newer GPUs
+            torch.backends.cudnn.benchmark = True
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+            torch.set_float32_matmul_precision("high")
+        # flat tensor lists for cheap target syncs (parameters and buffers)
+        self._q_tensors = [*self.q.parameters(), *self.q.buffers()]
+        self._target_q_tensors = [*self.target_q.parameters(), *self.target_q.buffers()]
+        self.sync_target()
 
         self.optimizer = optim.Adam(self.q.parameters(), lr=lr)
-        self.buffer = ReplayBuffer(buffer_capacity)
+        # by default the buffer lives next to the networks, so batches need
+        # no H2D copy; a CPU buffer for a GPU agent pins its sampled batches
+        buffer_device = torch.device(
+            buffer_device if buffer_device is not None else self.device
+        )
+        self.buffer = ReplayBuffer(
+            buffer_capacity,
+            obs_space.shape,
+            device=buffer_device,
+            pin_memory=buffer_device.type == "cpu" and self.device.type == "cuda",
+        )
 
         # hyperparams
         self.batch_size = batch_size
@@ -120,22 +269,105 @@ class DQNAgent(AbstractAgent):
         self.epsilon_final = epsilon_final
         self.epsilon_decay = epsilon_decay
         self.target_update_freq = target_update_freq
+        self.double_dqn = double_dqn
+        self.train_freq = train_freq
+        self.n_updates = n_updates
+        self.huber_loss = huber_loss
 
         self.total_steps = 0  # for ε decay and target sync
+        self._eps = epsilon_start  # ε cached for the step in self._eps_step
+        self._eps_step = -1
+        self._eps_schedule = np.empty(0, dtype=np.float32)  # filled by train()
+        # persistent input of predict_action, refilled on every call
+        self._state_buf = torch.empty(
+            (self.num_envs, obs_dim), dtype=torch.float32, device=self.device
+        )
+
+        # callables for the two hot paths, action selection and the update
+        # loss; compiled/scripted wrappers share the parameters of self.q /
+        # self.target_q, which remain plain modules so that state_dict keys
+        # (save/load, target sync) are unaffected
+        self._loss_fn = self._compute_loss
+        if compile_networks and hasattr(torch, "compile"):
+            self._compile_networks(obs_dim)
+        else:
+            # action selection runs small batches every env step, where
+            # TorchScript saves most of the eager framework overhead
+            self._q_act_fn = script_module(self.q)
 
         # Lists that will be plotted at the end
         self.frame_history: List[int] = []
         self.mean_reward_history: List[float] = []
 
+    def sync_target(self) -> None:
+        """Copy the online Q-network's weights into the target network in place."""
+        with torch.no_grad():
+            for target_t, t in zip(self._target_q_tensors, self._q_tensors):
+                target_t.copy_(t)
+
+    def _compile_networks(self, obs_dim: int) -> None:
+        """
+        Compile action selection and the update loss, and warm them up.
+
+        The loss is compiled as a whole (forward passes of both networks,
+        gather, TD target and loss), so that TorchInductor can fuse across
+        them. The warm-up runs each compiled function once per input shape
+        and autograd context it sees at runtime, including the backward pass
+        of the loss, so the compile cost is paid here rather than on the
+        first environment step or update.
+
+        Parameters
+        ----------
+        obs_dim : int
+            Dimensionality of observation space.
+        """
+        self._q_act_fn = torch.compile(self.q, mode="reduce-overhead", fullgraph=True)
+        self._loss_fn = torch.compile(
+            self._compute_loss, mode="reduce-overhead", fullgraph=True
+        )
+
+        with torch.inference_mode():
+            # action selection on one state per environment
+            self._q_act_fn(torch.zeros_like(self._state_buf))
+
+        # one dummy update's forward and backward; the gradients are
+        # discarded before any optimizer step
+        states = torch.zeros(self.batch_size, obs_dim, device=self.device)
+        actions = torch.zeros(self.batch_size, 1, dtype=torch.int64, device=self.device)
+        zeros = torch.zeros(self.batch_size, device=self.device)
+        self._loss_fn(states, actions, zeros, states, zeros).backward()
+        self.optimizer.zero_grad(set_to_none=True)
+
+    def _build_eps_schedule(self, num_steps: int) -> None:
+        """
+        Precompute ε for every step count in [0, num_steps].
+
+        Parameters
+        ----------
+        num_steps : int
+            Last step count covered by the table.
+        """
+        steps = np.arange(num_steps + 1, dtype=np.float32)
+        self._eps_schedule = (
+            self.epsilon_final
+            + (self.epsilon_start - self.epsilon_final)
+            * np.exp(-steps / self.epsilon_decay)
+        ).astype(np.float32)
+
     def epsilon(self) -> float:
         """
         Compute current ε by exponential decay.
 
+        Looks the value up in the schedule precomputed by `train` and falls
+        back to evaluating the formula outside of its range.
+
         Returns
         -------
         float
             Exploration rate.
         """
+        if self.total_steps < len(self._eps_schedule):
+            return float(self._eps_schedule[self.total_steps])
         # TODO (DONE): implement exponential‐decay
         # ε = ε_final + (ε_start - ε_final) * exp(-total_steps / ε_decay)
         # Currently, it is constant and returns the starting value ε
@@ -143,6 +375,13 @@ class DQNAgent(AbstractAgent):
             -self.total_steps / self.epsilon_decay
         )
 
+    def _current_epsilon(self) -> float:
+        """ε for the current step, cached since total_steps only changes per update."""
+        if self._eps_step != self.total_steps:
+            self._eps = self.epsilon()
+            self._eps_step = self.total_steps
+        return self._eps
+
     def predict_action(
         self, state: np.ndarray, evaluate: bool = False
     ) -> Tuple[int, Dict]:
@@ -152,7 +391,8 @@ class DQNAgent(AbstractAgent):
         Parameters
         ----------
         state : np.ndarray
-            Current observation.
+            Current observation, or a batch of observations (one per
+            sub-environment) for a vector environment.
         info : dict
             Gym info dict (unused here).
         evaluate : bool
@@ -161,30 +401,54 @@ class DQNAgent(AbstractAgent):
         Returns
         -------
         action : int
+            Or an np.ndarray of actions for a vector environment.
         info_out : dict
             Empty dict (compatible with interface).
         """
-        if evaluate:
-            # TODO (DONE): select purely greedy action from Q(s)
-            with torch.no_grad():
-                state_tensor = torch.as_tensor(state, dtype=torch.float32).unsqueeze(0)
-                qvals = self.q(state_tensor)
+        if self.is_vector_env:
+            return self._predict_actions(state, evaluate)
 
-            action = int(qvals.argmax(dim=1).item())
-        else:
-            if np.random.rand() < self.epsilon():
+        if not evaluate:
+            # decide on exploration first, so random steps skip the forward pass
+            if np.random.rand() < self._current_epsilon():
                 # TODO (DONE): sample random action
-                action = self.env.action_space.sample()
-            else:
-                # TODO (DONE): select purely greedy action from Q(s)
-                with torch.no_grad():
-                    state_tensor = torch.as_tensor(
-                        state, dtype=torch.float32
-                    ).unsqueeze(0)
-                    qvals = self.q(state_tensor)
-                action = int(qvals.argmax(dim=1).item())
+                return int(self.env.action_space.sample())
+
+        # TODO (DONE): select purely greedy action from Q(s)
+        with torch.inference_mode():
+            self._state_buf[0].copy_(torch.from_numpy(np.ascontiguousarray(state)))
+            qvals = self._q_act_fn(self._state_buf)
+        return int(qvals.argmax(dim=1).item())
+
+    def _predict_actions(self, states: np.ndarray, evaluate: bool) -> np.ndarray:
+        """
+        Batched ε-greedy action selection for a vector environment.
 
-        return action
+        Parameters
+        ----------
+        states : np.ndarray
+            Observations, shape (num_envs, obs_dim).
+        evaluate : bool
+            If True, always pick argmax(Q).
+
+        Returns
+        -------
+        np.ndarray
+            One action per sub-environment.
+        """
+        if evaluate:
+            explore = np.zeros(self.num_envs, dtype=bool)
+        else:
+            explore = np.random.rand(self.num_envs) < self._current_epsilon()
+
+        actions = self.env.action_space.sample() if explore.any() else None
+        if not explore.all():
+            # one forward pass for all sub-environments
+            with torch.inference_mode():
+                self._state_buf.copy_(torch.from_numpy(np.ascontiguousarray(states)))
+                greedy = self._q_act_fn(self._state_buf).argmax(dim=1).cpu().numpy()
+            actions = greedy if actions is None else np.where(explore, actions, greedy)
+        return actions
 
     def save(self, path: str) -> None:
         """
@@ -201,6 +465,7 @@ class DQNAgent(AbstractAgent):
                 "optimizer": self.optimizer.state_dict(),
             },
             path,
+            _use_new_zipfile_serialization=True,
         )
 
     def load(self, path: str) -> None:
@@ -212,57 +477,133 @@ class DQNAgent(AbstractAgent):
         path : str
             File path.
         """
-        checkpoint = torch.load(path)
+        # checkpoints only hold tensors and plain containers, so the
+        # restricted (and faster) weights-only unpickler suffices
+        checkpoint = torch.load(path, map_location=self.device, weights_only=True)
         self.q.load_state_dict(checkpoint["parameters"])
         self.optimizer.load_state_dict(checkpoint["optimizer"])
 
-    def update_agent(
-        self, training_batch: List[Tuple[Any, Any, float, Any, bool, Dict]]
-    ) -> float:
+    def update_agent(self, training_batch: ReplayBatch) -> float:
         """
         Perform one gradient update on a batch of transitions.
 
         Parameters
         ----------
-        training_batch : list of transitions
-            Each is (state, action, reward, next_state, done, info).
+        training_batch : ReplayBatch
+            Batched tensors of (states, actions, rewards, next_states, dones).
 
         Returns
         -------
         loss_val : float
-            MSE loss value.
+            Loss value (MSE, or Huber if `huber_loss` is set).
         """
-        # unpack
-        states, actions, rewards, next_states, dones, _ = zip(*training_batch)  # noqa: F841
-        s = torch.tensor(np.array(states), dtype=torch.float32)  # noqa: F841
-        a = torch.tensor(np.array(actions), dtype=torch.int64).unsqueeze(1)  # noqa: F841
-        r = torch.tensor(np.array(rewards), dtype=torch.float32)  # noqa: F841
-        s_next = torch.tensor(np.array(next_states), dtype=torch.float32)  # noqa: F841
-        mask = torch.tensor(np.array(dones), dtype=torch.float32)  # noqa: F841
-
-        # # TODO (DONE): pass batched states through self.q and gather Q(s,a)
-        q_values = self.q(s)
-        pred = q_values.gather(1, a).squeeze(1)
-
-        # TODO (DONE): compute TD target with frozen network
-        with torch.no_grad():
-            max_next_q = self.target_q(s_next).max(dim=1)[0]
-            target = r + (1.0 - mask) * self.gamma * max_next_q
+        # unpack (moving to the agent's device is a no-op unless the buffer
+        # lives elsewhere, where pinned batches make the copy asynchronous)
+        s, a, r, s_next, mask = (
+            t.to(self.device, non_blocking=True) for t in training_batch
+        )
+        a = a.unsqueeze(1)
 
-        loss = nn.MSELoss()(pred, target)
+        loss = self._loss_fn(s, a, r, s_next, mask)
 
         # gradient step
-        self.optimizer.zero_grad()
+        self.optimizer.zero_grad(set_to_none=True)
         loss.backward()
         self.optimizer.step()
 
         # occasionally sync target network
         if self.total_steps % self.target_update_freq == 0:
-            self.target_q.load_state_dict(self.q.state_dict())
+            self.sync_target()
 
         self.total_steps += 1
         return float(loss.item())
 
+    def _compute_loss(
+        self,
+        s: torch.Tensor,
+        a: torch.Tensor,
+        r: torch.Tensor,
+        s_next: torch.Tensor,
+        mask: torch.Tensor,
+    ) -> torch.Tensor:
+        """
+        Regression loss between Q(s, a) and the TD target for a batch.
+
+        Uses the Huber (smooth-L1) loss if `huber_loss` is set, MSE otherwise.
+
+        Parameters
+        ----------
+        s : torch.Tensor
+            States, shape (batch, obs_dim).
+        a : torch.Tensor
+            Actions, shape (batch, 1).
+        r : torch.Tensor
+            Rewards, shape (batch,).
+        s_next : torch.Tensor
+            Next states, shape (batch, obs_dim).
+        mask : torch.Tensor
+            1.0 where the episode ended, shape (batch,).
+
+        Returns
+        -------
+        torch.Tensor
+            Scalar loss.
+        """
+        # # TODO (DONE): pass batched states through self.q and gather Q(s,a)
+        if self.double_dqn:
+            # one fused online forward over [s; s_next] instead of two calls
+            q_all = self.q(torch.cat([s, s_next], dim=0))
+            q_values, q_next_online = q_all[: len(s)], q_all[len(s) :]
+        else:
+            q_values = self.q(s)
+        pred = q_values.gather(1, a).squeeze(1)
+
+        # TODO (DONE): compute TD target with frozen network
+        # (no_grad, not inference_mode: the loss saves the target for backward,
+        # and inference tensors cannot take part in autograd)
+        with torch.no_grad():
+            q_next = self.target_q(s_next)
+            if self.double_dqn:
+                next_a = q_next_online.argmax(dim=1, keepdim=True)
+                max_next_q = q_next.gather(1, next_a).squeeze(1)
+            else:
+                max_next_q = q_next.max(dim=1)[0]
+            target = r + (1.0 - mask) * self.gamma * max_next_q
+
+        if self.huber_loss:
+            return F.smooth_l1_loss(pred, target)
+        return F.mse_loss(pred, target)
+
+    def _run_updates(self) -> None:
+        """Do one round of n_updates gradient updates, if the buffer is ready."""
+        if len(self.buffer) >= self.batch_size:
+            for _ in range(self.n_updates):
+                # TODO (DONE): sample a batch from replay buffer
+                batch = self.buffer.sample(self.batch_size)
+                _ = self.update_agent(batch)
+
+    def _log_progress(
+        self, frame: int, recent_rewards: RewardWindow, eval_interval: int
+    ) -> None:
+        """
+        Record and print the mean episode reward.
+
+        Parameters
+        ----------
+        frame : int
+            Number of environment steps so far.
+        recent_rewards : RewardWindow
+            Returns of the most recent finished episodes.
+        eval_interval : int
+            Logging interval, shown in the printed message.
+        """
+        mean_r = recent_rewards.mean()
+        self.frame_history.append(frame)
+        self.mean_reward_history.append(mean_r)
+        print(
+            f"Frame {frame:>7}, mean reward (last {eval_interval} frames): {mean_r:.2f}"
+        )
+
     def train(self, num_frames: int, eval_interval: int = 1000) -> None:
         """
         Run a training loop for a fixed number of frames.
@@ -274,9 +615,21 @@ class DQNAgent(AbstractAgent):
         eval_interval : int
             Every this many episodes, print average reward.
         """
+        # upper bound on the number of updates in this run (a vector env
+        # may overshoot num_frames by up to num_envs frames)
+        self._build_eps_schedule(
+            self.total_steps
+            + (num_frames + self.num_envs) // self.train_freq * self.n_updates
+        )
+
+        if self.is_vector_env:
+            self._train_vectorized(num_frames, eval_interval)
+            print("Training complete.")
+            return
+
         state, _ = self.env.reset()
         ep_reward = 0.0
-        recent_rewards: List[float] = []
+        recent_rewards = RewardWindow(eval_interval)
 
         for frame in range(1, num_frames + 1):
             action = self.predict_action(state)
@@ -287,15 +640,13 @@ class DQNAgent(AbstractAgent):
             state = next_state
             ep_reward += reward
 
-            # update if ready
-            if len(self.buffer) >= self.batch_size:
-                # TODO (DONE): sample a batch from replay buffer
-                batch = batch = self.buffer.sample(self.batch_size)
-                _ = self.update_agent(batch)
+            # every train_freq frames, do n_updates updates if ready
+            if frame % self.train_freq == 0:
+                self._run_updates()
 
             if done or truncated:
                 state, _ = self.env.reset()
-                recent_rewards.append(ep_reward)
+                recent_rewards.add(ep_reward)
                 ep_reward = 0.0
                 # # logging
                 # if len(recent_rewards) % 10 == 0:
@@ -306,28 +657,115 @@ class DQNAgent(AbstractAgent):
                 #     )
             # log every eval_interval frames
             if frame % eval_interval == 0:
-                mean_r = (
-                    float(np.mean(recent_rewards[-eval_interval:]))
-                    if recent_rewards
-                    else 0.0
-                )
-                self.frame_history.append(frame)
-                self.mean_reward_history.append(mean_r)
-                print(
-                    f"Frame {frame:>7}, mean reward (last {eval_interval} frames): {mean_r:.2f}"
-                )
+                self._log_progress(frame, recent_rewards, eval_interval)
 
         print("Training complete.")
 
+    def _train_vectorized(self, num_frames: int, eval_interval: int) -> None:
+        """
+        Training loop for a vector environment.
 
-@hydra.main(config_path="../configs/agent/", config_name="dqn", version_base="1.1")
-def main(cfg: DictConfig):
-    # 1) build env
-    env = gym.make(cfg.env.name)
-    set_seed(env, cfg.seed)
+        Each iteration steps all sub-environments with one batched action
+        selection. Sub-environments are expected to autoreset on the step
+        after an episode ends (gymnasium's default "next step" mode); that
+        reset step yields no transition and is not counted as a frame.
 
-    # 3) TODO (DONE): instantiate & train the agent
-    agent = DQNAgent(
+        Parameters
+        ----------
+        num_frames : int
+            Total environment steps, summed over sub-environments.
+        eval_interval : int
+            Every this many frames, record and print average reward.
+        """
+        states, _ = self.env.reset()
+        ep_rewards = np.zeros(self.num_envs)
+        recent_rewards = RewardWindow(eval_interval)
+        autoreset = np.zeros(self.num_envs, dtype=bool)
+
+        frame = 0
+        update_credit = 0  # frames not yet paid for with an update round
+        next_log = eval_interval
+        while frame < num_frames:
+            actions = self.predict_action(states)
+            next_states, rewards, terminated, truncated, _ = self.env.step(actions)
+            dones = terminated | truncated
+
+            # store and step, skipping the reset step of finished episodes
+            valid = ~autoreset
+            if valid.all():
+                self.buffer.add_batch(states, actions, rewards, next_states, dones)
+            else:
+                self.buffer.add_batch(
+                    states[valid],
+                    actions[valid],
+                    rewards[valid],
+                    next_states[valid],
+                    dones[valid],
+                )
+            ep_rewards[valid] += rewards[valid]
+            for ep_reward in ep_rewards[dones].tolist():
+                recent_rewards.add(ep_reward)
+            ep_rewards[dones] = 0.0
+            states = next_states
+            autoreset = dones
+
+            n_new = int(valid.sum())
+            frame += n_new
+            update_credit += n_new
+            while update_credit >= self.train_freq:
+                update_credit -= self.train_freq
+                self._run_updates()
+
+            if frame >= next_log:
+                self._log_progress(frame, recent_rewards, eval_interval)
+                next_log = (frame // eval_interval + 1) * eval_interval
+
+
+def make_env(cfg: DictConfig) -> gym.Env:
+    """
+    Build the training environment described by the config.
+
+    Parameters
+    ----------
+    cfg : DictConfig
+        Config with `env.name` and `env.num_envs`.
+
+    Returns
+    -------
+    gym.Env
+        A single environment, or an AsyncVectorEnv stepping `env.num_envs`
+        copies in parallel if that is greater than 1.
+    """
+    env_name = cfg.env.name
+    if cfg.env.num_envs > 1:
+        return gym.vector.AsyncVectorEnv(
+            [lambda: gym.make(env_name) for _ in range(cfg.env.num_envs)]
+        )
+    return gym.make(env_name)
+
+
+def make_agent(
+    env: gym.Env, cfg: DictConfig, seed: int, q_network: QNetwork | None = None
+) -> DQNAgent:
+    """
+    Instantiate a DQNAgent from the config.
+
+    Parameters
+    ----------
+    env : gym.Env
+        Environment to train on.
+    cfg : DictConfig
+        Config with the `agent` hyperparameters and devices.
+    seed : int
+        RNG seed.
+    q_network : QNetwork, optional
+        Online Q-network to use, e.g. one shared between Hogwild workers.
+
+    Returns
+    -------
+    DQNAgent
+    """
+    return DQNAgent(
         env,
         buffer_capacity=cfg.agent.buffer_capacity,
         batch_size=cfg.agent.batch_size,
@@ -337,14 +775,29 @@ def main(cfg: DictConfig):
         epsilon_final=cfg.agent.epsilon_final,
         epsilon_decay=cfg.agent.epsilon_decay,
         target_update_freq=cfg.agent.target_update_freq,
-        seed=cfg.seed,
+        seed=seed,
+        device=cfg.device,
+        buffer_device=cfg.buffer_device,
+        compile_networks=cfg.agent.compile_networks,
+        double_dqn=cfg.agent.double_dqn,
+        train_freq=cfg.agent.train_freq,
+        n_updates=cfg.agent.n_updates,
+        q_network=q_network,
+        huber_loss=cfg.agent.huber_loss,
     )
 
-    agent.train(
-        num_frames=cfg.train.num_frames,
-        eval_interval=cfg.train.eval_interval,
-    )
 
+def plot_training_curve(agent: DQNAgent, cfg: DictConfig) -> None:
+    """
+    Save the agent's mean-reward curve as `<architecture>_training_curve.png`.
+
+    Parameters
+    ----------
+    agent : DQNAgent
+        A trained agent.
+    cfg : DictConfig
+        Config, optionally with `agent.architecture` to name the plot.
+    """
     # ---Partly LLM generated---
     if agent.frame_history:
         arch_name = getattr(cfg.agent, "architecture", "dqn").lower()
@@ -363,5 +816,93 @@ def main(cfg: DictConfig):
         print("No data collected – skipping plot.")
 
 
+def make_shared_q_network(cfg: DictConfig) -> QNetwork:
+    """
+    Build the online Q-network shared by Hogwild workers.
+
+    Seeds the RNGs with `cfg.seed` first, so the shared initial weights are
+    reproducible like those of a single-process agent.
+
+    Parameters
+    ----------
+    cfg : DictConfig
+        Config with `seed` and `env.name`.
+
+    Returns
+    -------
+    QNetwork
+        Q-network with its parameters in shared memory.
+    """
+    probe = gym.make(cfg.env.name)
+    set_seed(probe, cfg.seed)
+    q_network = QNetwork(probe.observation_space.shape[0], int(probe.action_space.n))
+    probe.close()
+    q_network.share_memory()
+    return q_network
+
+
+def hogwild_worker(rank: int, q_network: QNetwork, cfg: DictConfig) -> None:
+    """
+    Train one Hogwild worker against a Q-network in shared memory.
+
+    Each worker has its own environment, replay buffer, target network and
+    optimizer, and applies its gradient steps to the shared parameters
+    without locking. Worker 0 saves its training curve.
+
+    Parameters
+    ----------
+    rank : int
+        Worker index; also offsets the seed.
+    q_network : QNetwork
+        Shared online Q-network.
+    cfg : DictConfig
+        Experiment config.
+    """
+    # the workers already run in parallel; intra-op threads would only
+    # oversubscribe the cores
+    torch.set_num_threads(1)
+
+    env = make_env(cfg)
+    seed = cfg.seed + rank
+    set_seed(env, seed)
+    agent = make_agent(env, cfg, seed, q_network=q_network)
+    agent.train(
+        num_frames=cfg.train.num_frames // cfg.train.num_workers,
+        eval_interval=cfg.train.eval_interval,
+    )
+    env.close()
+
+    if rank == 0:
+        plot_training_curve(agent, cfg)
+
+
+@hydra.main(config_path="../configs/agent/", config_name="dqn", version_base="1.1")
+def main(cfg: DictConfig):
+    if cfg.train.num_workers > 1:
+        # Hogwild: CPU workers share one online Q-network and split the frames
+        if torch.device(cfg.device).type != "cpu":
+            raise ValueError("Hogwild training (num_workers > 1) requires device=cpu.")
+        q_network = make_shared_q_network(cfg)
+        torch.multiprocessing.spawn(
+            hogwild_worker, args=(q_network, cfg), nprocs=cfg.train.num_workers
+        )
+        return
+
+    # 1) build env (several copies stepped in parallel if num_envs > 1)
+    env = make_env(cfg)
+    set_seed(env, cfg.seed)
+
+    # 3) TODO (DONE): instantiate & train the agent
+    agent = make_agent(env, cfg, cfg.seed)
+
+    agent.train(
+        num_frames=cfg.train.num_frames,
+        eval_interval=cfg.train.eval_interval,
+    )
+    env.close()
+
+    plot_training_curve(agent, cfg)
+
+
 if __name__ == "__main__":
     main()
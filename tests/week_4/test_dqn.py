@@ -4,16 +4,28 @@
 Unit tests for the deep_q_learning module.
 
 Verifies:
- - ReplayBuffer behavior (inheritance, FIFO eviction, sampling).
+ - ReplayBuffer behavior (inheritance, FIFO eviction, batched sampling).
  - DQNAgent API (inheritance, predict_action, save/load, update, training loop).
 """
 
+import os
+import tempfile
 import unittest
 
 import gymnasium as gym
 import numpy as np
 import torch
-from rl_exercises.week_4 import DQNAgent, ReplayBuffer
+import torch.nn.functional as F
+from omegaconf import OmegaConf
+from rl_exercises.week_4 import DQNAgent, QNetwork, ReplayBatch, ReplayBuffer
+from rl_exercises.week_4.dqn import RewardWindow, make_shared_q_network, script_module
+
+
+class UnscriptableQNetwork(QNetwork):
+    """QNetwork whose forward uses syntax TorchScript does not support."""
+
+    def forward(self, x: torch.Tensor, **kwargs) -> torch.Tensor:
+        return self.net(x)
 
 
 class TestReplayBuffer(unittest.TestCase):
@@ -52,20 +64,52 @@ class TestReplayBuffer(unittest.TestCase):
         # add one more → pops state=0
         new_state = np.full((3,), 99, dtype=float)
         self.buf.add(new_state, 0, 0.0, new_state, False, {})
-        # sample full batch and check no zero
-        sampled = [t[0][0] for t in self.buf.sample(self.capacity)]
-        self.assertNotIn(0.0, sampled)
+        # the slot of state=0 must have been overwritten
+        self.assertNotIn(0.0, self.buf.states[: len(self.buf), 0].tolist())
+        self.assertIn(99.0, self.buf.states[: len(self.buf), 0].tolist())
 
-    def test_sample_unique(self):
-        """Sampling without replacement returns distinct indices."""
+    def test_sample_shapes(self):
+        """Sampling returns one batched array per transition field."""
         # add more than capacity
         for _ in range(10):
             self.buf.add(*self.sample_transition)
         batch = self.buf.sample(4)
-        self.assertEqual(len(batch), 4)
-        # check tuple shape
-        for t in batch:
-            self.assertEqual(len(t), 6)
+        self.assertIsInstance(batch, ReplayBatch)
+        self.assertEqual(batch.states.shape, (4, 3))
+        self.assertEqual(batch.next_states.shape, (4, 3))
+        for field in (batch.actions, batch.rewards, batch.dones):
+            self.assertEqual(field.shape, (4,))
+
+    def test_add_batch_matches_add(self):
+        """add_batch stores the same transitions as repeated add, with wraparound."""
+        other = ReplayBuffer(self.capacity)
+        for start in (0, 4):
+            states = np.arange(start, start + 4, dtype=float)[:, None].repeat(3, 1)
+            actions = np.arange(4)
+            rewards = np.full(4, 0.5)
+            dones = np.array([False, True, False, True])
+            self.buf.add_batch(states, actions, rewards, states + 1, dones)
+            for i in range(4):
+                other.add(
+                    states[i], actions[i], rewards[i], states[i] + 1, dones[i], {}
+                )
+        self.assertEqual(len(self.buf), len(other))
+        self.assertEqual(self.buf.ptr, other.ptr)
+        for field, expected in zip(self.buf._fields(), other._fields()):
+            self.assertTrue(torch.equal(field, expected))
+
+
+class TestRewardWindow(unittest.TestCase):
+    """Tests for the running mean of recent episode returns."""
+
+    def test_mean_of_last_returns(self):
+        """The mean covers only the most recent `size` returns."""
+        window = RewardWindow(3)
+        self.assertEqual(window.mean(), 0.0)
+        returns = [1.0, 5.0, 2.0, 8.0, 4.0]
+        for i, ret in enumerate(returns, start=1):
+            window.add(ret)
+            self.assertAlmostEqual(window.mean(), float(np.mean(returns[:i][-3:])))
 
 
 class TestDQNAgent(unittest.TestCase):
@@ -87,6 +131,20 @@ class TestDQNAgent(unittest.TestCase):
             seed=0,
         )
 
+    def test_epsilon_schedule(self):
+        """The precomputed ε table and its fallback follow the decay formula."""
+        agent = self.agent
+        agent.train(num_frames=50, eval_interval=25)
+        self.assertEqual(len(agent._eps_schedule), (50 + 1) // 4 + 1)
+
+        def expected(step):
+            return 0.1 + (0.5 - 0.1) * np.exp(-step / 10)
+
+        table_end = len(agent._eps_schedule)
+        for step in (0, table_end // 2, table_end - 1, table_end, table_end + 25):
+            agent.total_steps = step
+            self.assertAlmostEqual(agent.epsilon(), expected(step), places=6)
+
     def test_predict_action(self):
         """predict_action returns a valid action and an info dict."""
         obs, _ = self.env.reset(seed=0)
@@ -94,6 +152,16 @@ class TestDQNAgent(unittest.TestCase):
         self.assertIsInstance(action, int)
         self.assertTrue(self.env.action_space.contains(action))
 
+    def test_greedy_action_tracks_weights(self):
+        """Greedy actions follow in-place changes of the online network."""
+        obs, _ = self.env.reset(seed=0)
+        out_bias = self.agent.q.net.out.bias
+        for best in (0, 1):
+            with torch.no_grad():
+                out_bias.zero_()
+                out_bias[best] = 1e6
+            self.assertEqual(self.agent.predict_action(obs, evaluate=True), best)
+
     def test_update_agent(self):
         """One call to update_agent actually changes at least one weight."""
         # fill buffer
@@ -113,12 +181,180 @@ class TestDQNAgent(unittest.TestCase):
             )
         )
 
+    def test_update_agent_double_dqn(self):
+        """The Double DQN update also produces a float loss and changes weights."""
+        agent = DQNAgent(self.env, buffer_capacity=20, batch_size=4, double_dqn=True)
+        obs, _ = self.env.reset(seed=0)
+        for _ in range(agent.batch_size):
+            a = self.env.action_space.sample()
+            ns, r, d, tr, _ = self.env.step(a)
+            agent.buffer.add(obs, a, r, ns, d or tr, {})
+            obs = ns
+        before = [p.clone() for p in agent.q.parameters()]
+        loss = agent.update_agent(agent.buffer.sample(agent.batch_size))
+        self.assertIsInstance(loss, float)
+        self.assertTrue(
+            any(not torch.equal(b, a) for b, a in zip(before, agent.q.parameters()))
+        )
+
+    def _fill_buffer(self, agent):
+        """Add batch_size CartPole transitions to the agent's buffer."""
+        obs, _ = self.env.reset(seed=0)
+        for _ in range(agent.batch_size):
+            a = self.env.action_space.sample()
+            ns, r, d, tr, _ = self.env.step(a)
+            agent.buffer.add(obs, a, r, ns, d or tr, {})
+            obs = ns
+
+    def test_compiled_loss_matches_eager(self):
+        """The torch.compile'd loss equals the eager loss on the same batch."""
+        eager = DQNAgent(self.env, buffer_capacity=20, batch_size=8)
+        compiled = DQNAgent(
+            self.env, buffer_capacity=20, batch_size=8, compile_networks=True
+        )
+        compiled.q.load_state_dict(eager.q.state_dict())
+        compiled.sync_target()
+        self._fill_buffer(eager)
+        batch = eager.buffer.sample(eager.batch_size)
+        self.assertAlmostEqual(
+            compiled.update_agent(batch), eager.update_agent(batch), places=5
+        )
+
+    def test_huber_loss(self):
+        """huber_loss switches the TD loss from MSE to smooth-L1."""
+        mse = DQNAgent(self.env, buffer_capacity=20, batch_size=8)
+        huber = DQNAgent(self.env, buffer_capacity=20, batch_size=8, huber_loss=True)
+        huber.q.load_state_dict(mse.q.state_dict())
+        huber.sync_target()
+        self._fill_buffer(mse)
+        s, a, r, s_next, mask = mse.buffer.sample(mse.batch_size)
+        a = a.unsqueeze(1)
+        with torch.no_grad():
+            pred = mse.q(s).gather(1, a).squeeze(1)
+            target = r + (1.0 - mask) * mse.gamma * mse.target_q(s_next).max(1)[0]
+            loss = huber._compute_loss(s, a, r, s_next, mask)
+        self.assertTrue(torch.allclose(loss, F.smooth_l1_loss(pred, target)))
+        self.assertFalse(torch.allclose(loss, F.mse_loss(pred, target)))
+
+    def test_sync_target(self):
+        """sync_target copies the online weights into the target network."""
+        with torch.no_grad():
+            for p in self.agent.q.parameters():
+                p.add_(1.0)
+        self.agent.sync_target()
+        for p, tp in zip(self.agent.q.parameters(), self.agent.target_q.parameters()):
+            self.assertTrue(torch.equal(p, tp))
+            self.assertNotEqual(p.data_ptr(), tp.data_ptr())
+
+    def test_save_load(self):
+        """load restores the weights written by save."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dqn.pt")
+            self.agent.save(path)
+            saved = [p.clone() for p in self.agent.q.parameters()]
+            with torch.no_grad():
+                for p in self.agent.q.parameters():
+                    p.zero_()
+            self.agent.load(path)
+        for b, a in zip(saved, self.agent.q.parameters()):
+            self.assertTrue(torch.equal(b, a))
+
+    def test_shared_q_network(self):
+        """An agent built around a given Q-network trains that very network."""
+        q = QNetwork(4, 2)
+        q.share_memory()
+        agent = DQNAgent(self.env, buffer_capacity=20, batch_size=4, q_network=q)
+        self.assertIs(agent.q, q)
+        before = [p.clone() for p in q.parameters()]
+        agent.train(num_frames=20, eval_interval=10)
+        self.assertTrue(
+            any(not torch.equal(b, a) for b, a in zip(before, q.parameters()))
+        )
+
+    def test_custom_q_network_width(self):
+        """The target network matches a Q-network of non-default width."""
+        q = QNetwork(4, 2, hidden_dim=128)
+        agent = DQNAgent(self.env, buffer_capacity=20, batch_size=4, q_network=q)
+        for p, tp in zip(q.parameters(), agent.target_q.parameters()):
+            self.assertEqual(p.shape, tp.shape)
+            self.assertNotEqual(p.data_ptr(), tp.data_ptr())
+        agent.train(num_frames=20, eval_interval=10)
+        agent.sync_target()
+        for p, tp in zip(q.parameters(), agent.target_q.parameters()):
+            self.assertTrue(torch.equal(p, tp))
+
+    def test_shared_q_network_is_seeded(self):
+        """The Hogwild shared network is reproducible for a fixed seed."""
+        cfg = OmegaConf.create({"seed": 3, "env": {"name": "CartPole-v1"}})
+        first = make_shared_q_network(cfg)
+        torch.manual_seed(123)  # disturb the global RNG in between
+        second = make_shared_q_network(cfg)
+        for p1, p2 in zip(first.parameters(), second.parameters()):
+            self.assertTrue(torch.equal(p1, p2))
+        self.assertTrue(all(p.is_shared() for p in first.parameters()))
+
+    def test_unscriptable_q_network(self):
+        """A Q-network that cannot be scripted falls back to eager mode."""
+        q = UnscriptableQNetwork(4, 2)
+        self.assertIs(script_module(q), q)
+        agent = DQNAgent(self.env, buffer_capacity=20, batch_size=4, q_network=q)
+        obs, _ = self.env.reset(seed=0)
+        self.assertIn(agent.predict_action(obs, evaluate=True), (0, 1))
+
     def test_train_smoke(self):
         """A short training run should complete without errors."""
         self.agent.train(num_frames=50, eval_interval=25)
         # buffer should have grown
         self.assertGreater(len(self.agent.buffer), 0)
 
+    def test_update_cadence(self):
+        """train runs n_updates gradient steps every train_freq frames."""
+        agent = DQNAgent(
+            self.env, buffer_capacity=200, batch_size=4, train_freq=4, n_updates=3
+        )
+        agent.train(num_frames=101, eval_interval=50)
+        self.assertEqual(agent.total_steps, (101 // 4) * 3)
+
+    def test_vector_env(self):
+        """The agent acts on and trains from a vector environment."""
+        env = gym.vector.SyncVectorEnv(
+            [lambda: gym.make("CartPole-v1") for _ in range(3)]
+        )
+        agent = DQNAgent(env, buffer_capacity=100, batch_size=4, seed=0)
+        obs, _ = env.reset(seed=0)
+        actions = agent.predict_action(obs)
+        self.assertEqual(actions.shape, (3,))
+        self.assertTrue(env.action_space.contains(actions))
+
+        agent.train(num_frames=60, eval_interval=30)
+        self.assertGreaterEqual(len(agent.buffer), 60)
+        self.assertEqual(len(agent.frame_history), 2)
+        env.close()
+
+    def test_vector_env_update_cadence(self):
+        """Vector envs earn update rounds per valid transition collected."""
+        env = gym.vector.SyncVectorEnv(
+            [lambda: gym.make("CartPole-v1") for _ in range(3)]
+        )
+        agent = DQNAgent(
+            env, buffer_capacity=500, batch_size=4, train_freq=4, n_updates=2
+        )
+        agent.train(num_frames=101, eval_interval=50)
+        # the buffer holds every valid transition, i.e. every counted frame
+        self.assertGreaterEqual(len(agent.buffer), 101)
+        self.assertEqual(agent.total_steps, (len(agent.buffer) // 4) * 2)
+        env.close()
+
+    def test_vector_env_rejects_same_step_autoreset(self):
+        """Vector envs that do not autoreset on the next step are rejected."""
+        env = gym.vector.SyncVectorEnv(
+            [lambda: gym.make("CartPole-v1") for _ in range(2)],
+            autoreset_mode=gym.vector.AutoresetMode.SAME_STEP,
+        )
+        with self.assertRaises(ValueError):
+            DQNAgent(env, buffer_capacity=100, batch_size=4)
+        env.close()
+
 
 if __name__ == "__main__":
     unittest.main()